@@ -1,5 +1,7 @@
+import hashlib
 import streamlit as st
 import pandas as pd
+import numpy as np
 
 from config.settings import (
     APP_TITLE, APP_ICON, LAYOUT, CITY_MAPPING,
@@ -112,13 +114,16 @@ if uploaded_file is None:
 # ЗАГРУЗКА И ВАЛИДАЦИЯ ДАННЫХ
 # ============================================================================
 
-df, error = load_and_validate_data(uploaded_file)
+# Кэши загрузки и анализа адресуются содержимым файла, а не объектом загрузки
+file_bytes = uploaded_file.getvalue()
+file_hash = hashlib.md5(file_bytes).hexdigest()
+df, error = load_and_validate_data(file_bytes, file_hash)
 
 if error:
     st.error(f"❌ {error}")
     st.stop()
 
-st.success(f"✓ Данные успешно загружены: {len(df)} записей, {df['city'].nunique()} городов")
+st.success(f"✓ Данные успешно загружены: {len(df)} записей, {df.index.nunique()} городов")
 
 # ============================================================================
 # ВЫБОР ГОРОДА
@@ -126,7 +131,7 @@ st.success(f"✓ Данные успешно загружены: {len(df)} за
 
 st.header("🏙️ Выбор города")
 
-cities = sorted(df['city'].unique())
+cities = sorted(df.index.unique())
 selected_city = st.selectbox(
     "Выберите город для анализа:",
     cities,
@@ -135,11 +140,8 @@ selected_city = st.selectbox(
 
 st.markdown("---")
 
-# Фильтруем данные для выбранного города
-city_df = df[df['city'] == selected_city].copy()
-
-# Анализ данных
-city_data, season_stats, city_anomalies = analyze_city_data(city_df)
+# Анализ данных выбранного города (результат кэшируется по файлу и городу)
+city_data, season_stats, city_anomalies = analyze_city_data(df, selected_city, file_hash)
 
 # ============================================================================
 # ВКЛАДКИ
@@ -160,6 +162,8 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs([
 with tab1:
     st.header(f"📊 Описательная статистика: {selected_city}")
     
+    temp_stats = city_data['temperature'].describe()
+    
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
@@ -172,7 +176,7 @@ with tab1:
         st.metric("📏 Записей", f"{len(city_data)}")
     
     with col3:
-        st.metric("🌡️ Средняя температура", f"{city_data['temperature'].mean():.1f}°C")
+        st.metric("🌡️ Средняя температура", f"{temp_stats['mean']:.1f}°C")
     
     with col4:
         st.metric("⚠️ Аномалий", f"{len(city_anomalies)}")
@@ -183,10 +187,13 @@ with tab1:
     
     with col1:
         st.subheader("📋 Описательная статистика")
-        stats_df = city_data['temperature'].describe().to_frame()
+        stats_df = temp_stats.to_frame()
         stats_df.columns = ['Температура (°C)']
-        stats_df = stats_df.round(2)
-        st.dataframe(stats_df, use_container_width=True)
+        st.dataframe(
+            stats_df,
+            use_container_width=True,
+            column_config={'Температура (°C)': st.column_config.NumberColumn(format='%.2f')}
+        )
     
     with col2:
         st.subheader("📊 Распределение температур")
@@ -209,18 +216,24 @@ with tab2:
     fig = create_timeseries(city_data, city_anomalies)
     st.plotly_chart(fig, use_container_width=True, key='timeseries_main')
     
+    temps = city_data['temperature'].to_numpy()
+    imax = np.nanargmax(temps)
+    imin = np.nanargmin(temps)
+    tmax = temp_stats['max']
+    tmin = temp_stats['min']
+    
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        max_date = city_data[city_data['temperature'] == city_data['temperature'].max()]['timestamp'].dt.strftime('%Y-%m-%d').values[0]
-        st.metric("🔥 Максимум", f"{city_data['temperature'].max():.1f}°C", max_date)
+        max_date = city_data['timestamp'].iloc[imax].strftime('%Y-%m-%d')
+        st.metric("🔥 Максимум", f"{tmax:.1f}°C", max_date)
     
     with col2:
-        min_date = city_data[city_data['temperature'] == city_data['temperature'].min()]['timestamp'].dt.strftime('%Y-%m-%d').values[0]
-        st.metric("❄️ Минимум", f"{city_data['temperature'].min():.1f}°C", min_date)
+        min_date = city_data['timestamp'].iloc[imin].strftime('%Y-%m-%d')
+        st.metric("❄️ Минимум", f"{tmin:.1f}°C", min_date)
     
     with col3:
-        st.metric("📊 Размах", f"{city_data['temperature'].max() - city_data['temperature'].min():.1f}°C")
+        st.metric("📊 Размах", f"{tmax - tmin:.1f}°C")
 
 # ============================================================================
 # ВКЛАДКА 3: СЕЗОННЫЙ АНАЛИЗ
@@ -234,12 +247,19 @@ with tab3:
     season_display = season_stats[['season_ru', 'mean', 'std', 'min', 'max', 'count']].copy()
     season_display.columns = ['Сезон', 'Среднее (°C)', 'Ст. откл. (°C)', 
                                'Минимум (°C)', 'Максимум (°C)', 'Записей']
-    season_display = season_display.round(2)
     
     season_display['sort_order'] = season_display['Сезон'].map(SEASON_ORDER)
     season_display = season_display.sort_values('sort_order').drop('sort_order', axis=1)
     
-    st.dataframe(season_display, use_container_width=True, hide_index=True)
+    st.dataframe(
+        season_display,
+        use_container_width=True,
+        hide_index=True,
+        column_config={
+            col: st.column_config.NumberColumn(format='%.2f')
+            for col in ['Среднее (°C)', 'Ст. откл. (°C)', 'Минимум (°C)', 'Максимум (°C)']
+        }
+    )
     
     st.markdown("---")
     
@@ -248,10 +268,13 @@ with tab3:
     with col1:
         st.subheader("📈 Средняя температура по сезонам")
         
-        available_seasons = [s for s in SEASONS_ORDERED if s in season_stats['season_ru'].values]
+        seasons_present = set(season_stats['season_ru'])
+        available_seasons = [s for s in SEASONS_ORDERED if s in seasons_present]
         
         if len(available_seasons) > 0:
-            season_stats_ordered = season_stats.set_index('season_ru').loc[available_seasons].reset_index()
+            season_stats_ordered = season_stats[season_stats['season_ru'].isin(available_seasons)].sort_values(
+                'season_ru', key=lambda col: col.map(SEASON_ORDER), kind='mergesort'
+            )
             fig = create_seasonal_bar_chart(season_stats_ordered)
             st.plotly_chart(fig, use_container_width=True, key='seasonal_mean_temp')
         else:
@@ -318,13 +341,21 @@ with tab4:
         anomalies_display = city_anomalies[['timestamp', 'temperature', 'season_ru', 'lower_bound', 'upper_bound', 'deviation']].copy()
         anomalies_display['timestamp'] = anomalies_display['timestamp'].dt.strftime('%Y-%m-%d')
         anomalies_display.columns = ['Дата', 'Температура', 'Сезон', 'Нижняя граница', 'Верхняя граница', 'Отклонение']
-        anomalies_display = anomalies_display.round(2)
-        anomalies_display['Тип'] = anomalies_display.apply(
-            lambda row: '🔥 Высокая' if row['Температура'] > row['Верхняя граница'] else '❄️ Низкая',
-            axis=1
+        anomalies_display['Тип'] = np.where(
+            anomalies_display['Температура'].to_numpy() > anomalies_display['Верхняя граница'].to_numpy(),
+            '🔥 Высокая',
+            '❄️ Низкая'
         )
         
-        st.dataframe(anomalies_display.sort_values('Дата', ascending=False), use_container_width=True, hide_index=True)
+        st.dataframe(
+            anomalies_display.sort_values('Дата', ascending=False),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                col: st.column_config.NumberColumn(format='%.2f')
+                for col in ['Температура', 'Нижняя граница', 'Верхняя граница', 'Отклонение']
+            }
+        )
 
 # ============================================================================
 # ВКЛАДКА 5: ТЕКУЩАЯ ТЕМПЕРАТУРА
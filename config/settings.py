@@ -44,7 +44,12 @@ SEASON_COLORS = {
 # Настройки API
 OPENWEATHER_BASE_URL = "http://api.openweathermap.org/data/2.5/weather"
 API_TIMEOUT = 10
+API_CACHE_TTL = 600  # секунд хранения ответа в кэше
 
 # Настройки анализа
 ROLLING_WINDOW = 30  # дней для скользящего среднего
 ANOMALY_THRESHOLD = 2  # количество стандартных отклонений
+
+# Настройки визуализации
+TIMESERIES_RESAMPLE_THRESHOLD = 50_000  # строк, начиная с которых ряд агрегируется (LTTB)
+TIMESERIES_RESAMPLED_POINTS = 5000  # точек на трассу после агрегации
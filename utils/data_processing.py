@@ -1,8 +1,17 @@
+import io
 import pandas as pd
 import numpy as np
+import streamlit as st
 from datetime import datetime
+from numba import njit
 from config.settings import SEASON_MAPPING, ANOMALY_THRESHOLD, ROLLING_WINDOW
 
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = 'pyarrow'
+except ImportError:
+    CSV_ENGINE = 'c'
+
 
 def translate_season(season):
     return SEASON_MAPPING.get(season.lower(), season)
@@ -24,64 +33,147 @@ def get_season_name_ru(season_eng):
     return translate_season(season_eng)
 
 
-def load_and_validate_data(uploaded_file):
+# Аргумент _file_bytes не хэшируется Streamlit: кэш адресуется хэшем содержимого файла
+@st.cache_data(show_spinner=False)
+def load_and_validate_data(_file_bytes, file_hash):
     try:
-        df = pd.read_csv(uploaded_file)
-        df['timestamp'] = pd.to_datetime(df['timestamp'])
         required_columns = ['city', 'timestamp', 'temperature', 'season']
-        missing_columns = [col for col in required_columns if col not in df.columns]
+        header = pd.read_csv(io.BytesIO(_file_bytes), nrows=0).columns
+        missing_columns = [col for col in required_columns if col not in header]
         
         if missing_columns:
             return None, f"Отсутствуют необходимые колонки: {', '.join(missing_columns)}"
         
-        df['season'] = df['season'].str.lower().str.strip()
-        df['season_ru'] = df['season'].apply(translate_season)
-        df = df.sort_values(['city', 'timestamp']).reset_index(drop=True)
+        df = pd.read_csv(
+            io.BytesIO(_file_bytes),
+            engine=CSV_ENGINE,
+            usecols=required_columns,
+            dtype={'temperature': 'float64', 'city': 'category', 'season': 'category'}
+        )
+        # pyarrow сам распознаёт даты и переводит даты со смещением в UTC; чтобы
+        # сохранить исходное смещение, как pd.to_datetime, такие даты перечитываются строками
+        if isinstance(df['timestamp'].dtype, pd.DatetimeTZDtype):
+            df['timestamp'] = pd.read_csv(
+                io.BytesIO(_file_bytes), usecols=['timestamp'], dtype={'timestamp': str}
+            )['timestamp']
+        df['timestamp'] = pd.to_datetime(df['timestamp'])
+        
+        df['season'] = df['season'].str.strip().str.lower()
+        df['season_ru'] = df['season'].map(SEASON_MAPPING).fillna(df['season'])
+        df['season'] = df['season'].astype('category')
+        # Индекс по городу отсортирован, поэтому срез города ищется бинарным поиском
+        df = df.sort_values(['city', 'timestamp']).set_index('city')
         return df, None 
     except Exception as e:
         return None, f"Ошибка при загрузке файла: {str(e)}"
 
 
-def analyze_city_data(city_df):
-    city_df = city_df.sort_values('timestamp').copy()
-    city_df['rolling_mean_' + str(ROLLING_WINDOW)] = city_df['temperature'].rolling(
-        window=ROLLING_WINDOW, min_periods=1
-    ).mean()
+@njit(cache=True)
+def _rolling_mean_fixed(values, window):
+    # Скользящее среднее с окном window и min_periods=1, пропуски не учитываются
+    n = len(values)
+    out = np.empty(n)
+    total = 0.0
+    count = 0
+    for i in range(n):
+        value = values[i]
+        if not np.isnan(value):
+            total += value
+            count += 1
+        if i >= window:
+            old = values[i - window]
+            if not np.isnan(old):
+                total -= old
+                count -= 1
+        out[i] = total / count if count > 0 else np.nan
+    return out
+
+
+@njit(cache=True)
+def _season_stats_and_mask(codes, temps, n_seasons, threshold):
+    # Первый проход: среднее и дисперсия по сезонам (Уэлфорд), min/max/count
+    counts = np.zeros(n_seasons, dtype=np.int64)
+    means = np.zeros(n_seasons)
+    m2 = np.zeros(n_seasons)
+    mins = np.full(n_seasons, np.inf)
+    maxs = np.full(n_seasons, -np.inf)
+    for i in range(len(temps)):
+        code = codes[i]
+        temp = temps[i]
+        if code < 0 or np.isnan(temp):
+            continue
+        counts[code] += 1
+        delta = temp - means[code]
+        means[code] += delta / counts[code]
+        m2[code] += delta * (temp - means[code])
+        mins[code] = min(mins[code], temp)
+        maxs[code] = max(maxs[code], temp)
     
-    season_stats = city_df.groupby('season')['temperature'].agg([
-        ('mean', 'mean'),
-        ('std', 'std'),
-        ('min', 'min'),
-        ('max', 'max'),
-        ('count', 'count')
-    ]).reset_index()
-    season_stats['season_ru'] = season_stats['season'].apply(translate_season)
+    stds = np.full(n_seasons, np.nan)
+    for code in range(n_seasons):
+        if counts[code] == 0:
+            means[code] = np.nan
+            mins[code] = np.nan
+            maxs[code] = np.nan
+        elif counts[code] > 1:
+            stds[code] = np.sqrt(m2[code] / (counts[code] - 1))
     
-    anomalies_list = []
-    for season in city_df['season'].unique():
-        season_data = city_df[city_df['season'] == season]
-        mean_temp = season_data['temperature'].mean()
-        std_temp = season_data['temperature'].std()
-        
-        # Считаю аномалии относительно сезона
-        lower_bound = mean_temp - ANOMALY_THRESHOLD * std_temp
-        upper_bound = mean_temp + ANOMALY_THRESHOLD * std_temp
-        
-        anomalies = season_data[
-            (season_data['temperature'] < lower_bound) | 
-            (season_data['temperature'] > upper_bound)
-        ].copy()
-        
-        if len(anomalies) > 0:
-            anomalies['lower_bound'] = lower_bound
-            anomalies['upper_bound'] = upper_bound
-            anomalies['deviation'] = anomalies['temperature'] - mean_temp
-            anomalies_list.append(anomalies)
+    # Второй проход: границы нормы и маска аномалий для каждой строки
+    n = len(temps)
+    lower = np.full(n, np.nan)
+    upper = np.full(n, np.nan)
+    deviation = np.full(n, np.nan)
+    mask = np.zeros(n, dtype=np.bool_)
+    for i in range(n):
+        code = codes[i]
+        if code < 0:
+            continue
+        lower[i] = means[code] - threshold * stds[code]
+        upper[i] = means[code] + threshold * stds[code]
+        deviation[i] = temps[i] - means[code]
+        mask[i] = temps[i] < lower[i] or temps[i] > upper[i]
     
-    if anomalies_list:
-        city_anomalies = pd.concat(anomalies_list, ignore_index=True)
-    else:
-        city_anomalies = pd.DataFrame()
+    return means, stds, mins, maxs, counts, lower, upper, deviation, mask
+
+
+# Аргумент _df не хэшируется Streamlit: кэш адресуется хэшем содержимого файла,
+# чтобы не пересчитывать хэш всего датафрейма на каждом перезапуске скрипта
+@st.cache_data(show_spinner=False)
+def analyze_city_data(_df, selected_city, file_hash):
+    # _df из load_and_validate_data уже отсортирован по городу и времени,
+    # поэтому пересортировка нужна только для данных, собранных иначе
+    city_df = _df.loc[selected_city:selected_city].reset_index()
+    if not city_df['timestamp'].is_monotonic_increasing:
+        city_df = city_df.sort_values('timestamp', kind='mergesort', ignore_index=True)
+    city_df['rolling_mean_' + str(ROLLING_WINDOW)] = _rolling_mean_fixed(
+        city_df['temperature'].to_numpy(), ROLLING_WINDOW
+    )
+    
+    # Считаю статистику и аномалии относительно сезона за два прохода в numba
+    season_codes, seasons = pd.factorize(city_df['season'], sort=True)
+    (means, stds, mins, maxs, counts,
+     lower_bound, upper_bound, deviation, is_anomaly) = _season_stats_and_mask(
+        season_codes,
+        city_df['temperature'].to_numpy(),
+        len(seasons),
+        ANOMALY_THRESHOLD
+    )
+    
+    season_stats = pd.DataFrame({
+        'season': seasons.astype(str),
+        'mean': means,
+        'std': stds,
+        'min': mins,
+        'max': maxs,
+        'count': counts
+    })
+    season_stats['season_ru'] = season_stats['season'].map(SEASON_MAPPING).fillna(season_stats['season'])
+    
+    city_df['lower_bound'] = lower_bound
+    city_df['upper_bound'] = upper_bound
+    city_df['deviation'] = deviation
+    city_df['is_anomaly'] = is_anomaly
+    city_anomalies = city_df.loc[city_df['is_anomaly']]
     return city_df, season_stats, city_anomalies
 
 
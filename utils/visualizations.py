@@ -1,8 +1,14 @@
 import plotly.graph_objects as go
 import plotly.express as px
-from config.settings import SEASON_COLORS, SEASONS_ORDERED
+import streamlit as st
+from plotly_resampler import FigureResampler
+from config.settings import (
+    SEASON_COLORS, SEASONS_ORDERED,
+    TIMESERIES_RESAMPLE_THRESHOLD, TIMESERIES_RESAMPLED_POINTS
+)
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
 def create_histogram(city_data):
     fig = px.histogram(
         city_data,
@@ -15,6 +21,7 @@ def create_histogram(city_data):
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
 def create_boxplot(city_data):
     fig = px.box(
         city_data,
@@ -28,12 +35,23 @@ def create_boxplot(city_data):
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
 def create_timeseries(city_data, city_anomalies):
-    fig = go.Figure()
+    # Только очень длинные ряды агрегируются (LTTB): в Streamlit нет обратного
+    # вызова для догрузки точек при зуме, поэтому обычные ряды рисуются целиком
+    if len(city_data) > TIMESERIES_RESAMPLE_THRESHOLD:
+        fig = FigureResampler(
+            go.Figure(),
+            default_n_shown_samples=TIMESERIES_RESAMPLED_POINTS,
+            resampled_trace_prefix_suffix=('', ''),
+            show_mean_aggregation_size=False
+        )
+    else:
+        fig = go.Figure()
     
-    normal_data = city_data[~city_data.index.isin(city_anomalies.index)]
+    normal_data = city_data.loc[~city_data['is_anomaly']]
     
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=normal_data['timestamp'],
         y=normal_data['temperature'],
         mode='lines',
@@ -42,7 +60,7 @@ def create_timeseries(city_data, city_anomalies):
         opacity=0.6
     ))
     
-    fig.add_trace(go.Scatter(
+    fig.add_trace(go.Scattergl(
         x=city_data['timestamp'],
         y=city_data['rolling_mean_30'],
         mode='lines',
@@ -51,7 +69,7 @@ def create_timeseries(city_data, city_anomalies):
     ))
     
     if len(city_anomalies) > 0:
-        fig.add_trace(go.Scatter(
+        fig.add_trace(go.Scattergl(
             x=city_anomalies['timestamp'],
             y=city_anomalies['temperature'],
             mode='markers',
@@ -67,7 +85,8 @@ def create_timeseries(city_data, city_anomalies):
     fig.update_layout(
         xaxis_title='Дата',
         yaxis_title='Температура (°C)',
-        hovermode='x unified',
+        # Общая подсказка по всем трассам дорога только на агрегируемых рядах
+        hovermode='x unified' if len(city_data) <= TIMESERIES_RESAMPLE_THRESHOLD else 'x',
         height=500,
         showlegend=True,
         legend=dict(
@@ -82,6 +101,7 @@ def create_timeseries(city_data, city_anomalies):
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
 def create_seasonal_bar_chart(season_stats_ordered):
     colors = [SEASON_COLORS.get(s, 'gray') for s in season_stats_ordered['season_ru']]
     
@@ -110,6 +130,7 @@ def create_seasonal_bar_chart(season_stats_ordered):
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
 def create_seasonal_variability_chart(season_stats_ordered):
     fig = go.Figure()
     
@@ -131,6 +152,7 @@ def create_seasonal_variability_chart(season_stats_ordered):
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
 def create_seasonal_ranges_chart(season_stats_ordered, available_seasons):
     fig = go.Figure()
     
@@ -154,6 +176,7 @@ def create_seasonal_ranges_chart(season_stats_ordered, available_seasons):
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
 def create_anomalies_bar_chart(anomalies_by_season):
     fig = px.bar(
         anomalies_by_season,
@@ -167,6 +190,7 @@ def create_anomalies_bar_chart(anomalies_by_season):
     return fig
 
 
+@st.cache_resource(show_spinner=False, max_entries=32)
 def create_current_temp_visualization(current_temp, current_season_ru, normality):
     fig = go.Figure()
     
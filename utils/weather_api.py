@@ -1,26 +1,33 @@
 import requests
+import streamlit as st
 from datetime import datetime
-from config.settings import OPENWEATHER_BASE_URL, API_TIMEOUT
+from requests.adapters import HTTPAdapter
+from config.settings import OPENWEATHER_BASE_URL, API_TIMEOUT, API_CACHE_TTL
 
+# Общая сессия держит keep-alive соединения между запросами
+_session = requests.Session()
+_session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
+_session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4))
 
-def get_current_temperature(city_name, api_key):
+
+# Кэшируются только успешные ответы: при ошибке функция бросает исключение,
+# а st.cache_data исключения не сохраняет
+@st.cache_data(ttl=API_CACHE_TTL, show_spinner=False)
+def _fetch_current_weather(city_name, api_key):
     params = {
         'q': city_name,
         'appid': api_key,
         'units': 'metric',
         'lang': 'ru'
     }
+    response = _session.get(OPENWEATHER_BASE_URL, params=params, timeout=API_TIMEOUT)
+    response.raise_for_status()
+    return response.json()
+
+
+def get_current_temperature(city_name, api_key):
     try:
-        response = requests.get(OPENWEATHER_BASE_URL, params=params, timeout=API_TIMEOUT)
-        if response.status_code == 401:
-            return {
-                'success': False,
-                'error': 'invalid_key',
-                'message': response.json().get('message', 'Invalid API key')
-            }
-        
-        response.raise_for_status()
-        data = response.json()
+        data = _fetch_current_weather(city_name, api_key)
         
         return {
             'success': True,
@@ -35,6 +42,16 @@ def get_current_temperature(city_name, api_key):
             'timestamp': datetime.fromtimestamp(data['dt'])
         } 
     except requests.exceptions.RequestException as e:
+        if e.response is not None and e.response.status_code == 401:
+            try:
+                message = e.response.json().get('message', 'Invalid API key')
+            except ValueError:
+                message = 'Invalid API key'
+            return {
+                'success': False,
+                'error': 'invalid_key',
+                'message': message
+            }
         return {
             'success': False,
             'error': 'request_error',